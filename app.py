@@ -1,23 +1,404 @@
 # app.py
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+from flask import Flask, Response, render_template, request, jsonify, session, redirect, url_for, stream_with_context
 from werkzeug.security import generate_password_hash, check_password_hash
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from collections import deque
 from datetime import datetime, timedelta
 from functools import lru_cache, wraps
 import json
+import threading
+import zlib
 import pandas as pd
 import numpy as np
 import os
+import sys
 import time
 
 app = Flask(__name__)
 app.secret_key = 'pokertracker69asjhdabhsd!@$#(*)'
 app.permanent_session_lifetime = timedelta(days=7)
 
+
+class HasherBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    # Runs scrypt hashing on a small dedicated pool so a burst of logins can only
+    # occupy max_workers cores; everything past max_pending is turned away at once
+    def __init__(self, max_workers=None, max_pending=16, timeout=10):
+        if max_workers is None:
+            max_workers = max(1, (os.cpu_count() or 2) // 2)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pwhash')
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.timeout = timeout
+
+    def run(self, fn, *args):
+        if not self.slots.acquire(blocking=False):
+            raise HasherBusy('password hashing queue is full')
+        try:
+            future = self.executor.submit(fn, *args)
+        except RuntimeError:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # still queued: drop it so it doesn't burn a worker for a caller that has gone
+            future.cancel()
+            raise HasherBusy('password hashing timed out')
+
+    def hash(self, password):
+        return self.run(generate_password_hash, password)
+
+    def check(self, password_hash, password):
+        return self.run(check_password_hash, password_hash, password)
+
+
+class AttemptThrottle:
+    # Sliding-window limit on attempts per key (e.g. client IP or username).
+    # The table is kept in least-recently-used order and capped at max_keys, so a
+    # storm of random usernames can't grow it without bound.
+    def __init__(self, max_attempts, window_seconds=60, max_keys=10000):
+        self.max_attempts = max_attempts
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+        self.attempts = {}
+        self.lock = threading.Lock()
+
+    def allow(self, key):
+        # check and count an attempt in one step
+        return self.check(key, record=True)
+
+    def blocked(self, key):
+        # check without counting, for limits that only count failures via record()
+        return not self.check(key, record=False)
+
+    def record(self, key):
+        self.check(key, record=True)
+
+    def check(self, key, record):
+        now = time.monotonic()
+        with self.lock:
+            recent = self.attempts.pop(key, None)
+            if recent is None:
+                if not record:
+                    return True
+                recent = deque()
+                self.evict(now)
+            while recent and now - recent[0] > self.window_seconds:
+                recent.popleft()
+            allowed = len(recent) < self.max_attempts
+            if allowed and record:
+                recent.append(now)
+            self.attempts[key] = recent
+            return allowed
+
+    def evict(self, now):
+        # Drop keys whose attempts have all expired, oldest first; if the table is
+        # still full, give up the least recently used key to make room
+        while self.attempts:
+            oldest = next(iter(self.attempts))
+            recent = self.attempts[oldest]
+            if recent and now - recent[-1] <= self.window_seconds:
+                break
+            del self.attempts[oldest]
+        while len(self.attempts) >= self.max_keys:
+            del self.attempts[next(iter(self.attempts))]
+
+    def reset(self, key):
+        with self.lock:
+            self.attempts.pop(key, None)
+
+
+# In-memory column layout. Pick counts are whole numbers, so float32 holds them exactly.
+# Stakes and durations come straight from user input with no enforced step, and money
+# and elo deltas are summed back into balances, so all of those stay float64.
+POKER_SCHEMA = {
+    'date': 'datetime64[ns]',
+    'location': 'category',
+    'small_blind': 'float64',
+    'big_blind': 'float64',
+    'buy_in': 'float64',
+    'buy_out': 'float64',
+    'duration': 'float64',
+    'profit_loss': 'float64',
+    'elo_change': 'float64'
+}
+POKER_DERIVED = ['bb_won', 'hourly_rate', 'cumulative_profit', 'session_length_category']
+# bytes per row the derived columns took when stored: a float64, or a pointer plus label string
+POKER_DERIVED_BYTES = 3 * 8 + 8 + sys.getsizeof('0-2h')
+
+SPORT_SCHEMA = {
+    'date': 'datetime64[ns]',
+    'sport': 'category',
+    '# picks': 'float32',
+    'bet amount': 'float64',
+    'amountwonlost': 'float64',
+    'elochange': 'float64'
+}
+SPORT_DERIVED = ['cumulative_profit', 'bet_amount_category']
+SPORT_DERIVED_BYTES = 8 + 8 + sys.getsizeof('$10-20')
+
+
+class ProfitIndex:
+    # Fenwick tree over a user's distinct session minutes, coordinate-compressed into
+    # flat numpy arrays (about 24 bytes per distinct minute). Changing the profit at a
+    # minute that is already indexed and summing profit up to any date are O(log n).
+    # A minute that isn't indexed yet goes into a small buffer kept as sorted keys plus
+    # prefix sums, so queries stay O(log n). Adding to the buffer re-sorts it, O(sqrt(n)),
+    # and once it outgrows sqrt(n) it is folded in by an O(n) vectorized rebuild, so a
+    # new date costs O(sqrt(n)) amortized.
+    MIN_BUFFER = 64
+
+    def __init__(self, keys=None, amounts=None):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.index_pending()
+        self.rebuild(np.asarray(keys if keys is not None else [], dtype=np.int64),
+                     np.asarray(amounts if amounts is not None else [], dtype=np.float64))
+
+    @classmethod
+    def from_frame(cls, df):
+        if df.empty:
+            return cls()
+        return cls(cls.minutes(df['date']), df['profit_loss'].to_numpy(dtype=np.float64))
+
+    @staticmethod
+    def minutes(dates):
+        return pd.to_datetime(dates).to_numpy(dtype='datetime64[ns]').astype(np.int64) // 60_000_000_000
+
+    @staticmethod
+    def minute(date):
+        return int(pd.Timestamp(date).value // 60_000_000_000)
+
+    def rebuild(self, keys, amounts):
+        keys, inverse = np.unique(keys, return_inverse=True)
+        values = np.bincount(inverse, weights=amounts, minlength=len(keys))
+        keep = values != 0
+        self.keys = keys[keep]
+        self.values = values[keep]
+        # Fenwick node i covers (i - lowbit(i), i], i.e. a difference of two prefix sums
+        prefix = np.concatenate(([0.0], np.cumsum(self.values)))
+        i = np.arange(1, len(self.keys) + 1)
+        self.tree = np.concatenate(([0.0], prefix[i] - prefix[i - (i & -i)]))
+
+    def flush(self):
+        if self.pending:
+            pending = np.fromiter(self.pending.keys(), dtype=np.int64, count=len(self.pending))
+            amounts = np.fromiter(self.pending.values(), dtype=np.float64, count=len(self.pending))
+            self.pending = {}
+            self.index_pending()
+            self.rebuild(np.concatenate((self.keys, pending)), np.concatenate((self.values, amounts)))
+
+    def index_pending(self):
+        self.pending_keys = np.fromiter(sorted(self.pending), dtype=np.int64, count=len(self.pending))
+        amounts = np.fromiter((self.pending[k] for k in self.pending_keys), dtype=np.float64, count=len(self.pending))
+        self.pending_prefix = np.concatenate(([0.0], np.cumsum(amounts)))
+
+    def add(self, date, amount):
+        key = self.minute(date)
+        with self.lock:
+            pos = int(np.searchsorted(self.keys, key))
+            if pos < len(self.keys) and self.keys[pos] == key:
+                self.values[pos] += amount
+                i = pos + 1
+                while i < len(self.tree):
+                    self.tree[i] += amount
+                    i += i & -i
+                return
+            self.pending[key] = self.pending.get(key, 0.0) + amount
+            if len(self.pending) > max(self.MIN_BUFFER, int(len(self.keys) ** 0.5)):
+                self.flush()
+            else:
+                self.index_pending()
+
+    def total_through(self, key):
+        with self.lock:
+            i = int(np.searchsorted(self.keys, key, side='right'))
+            total = 0.0
+            while i > 0:
+                total += self.tree[i]
+                i -= i & -i
+            return float(total + self.pending_prefix[np.searchsorted(self.pending_keys, key, side='right')])
+
+    def total_until(self, date):
+        # profit of every session at or before date
+        return self.total_through(self.minute(date))
+
+    def total_between(self, start, end):
+        return self.total_through(self.minute(end)) - self.total_through(self.minute(start) - 1)
+
+    def running_totals(self, dates):
+        # cumulative profit at each of dates (sessions in the same minute share a total);
+        # one vectorized pass over the index instead of sorting the frame
+        with self.lock:
+            self.flush()
+            prefix = np.concatenate(([0.0], np.cumsum(self.values)))
+            return prefix[np.searchsorted(self.keys, self.minutes(dates), side='right')]
+
+    def nbytes(self):
+        return int(self.keys.nbytes + self.values.nbytes + self.tree.nbytes + self.pending_keys.nbytes
+                   + self.pending_prefix.nbytes) + 100 * len(self.pending)
+
+
+def compact_frame(df, schema):
+    # Drop anything outside the schema (derived columns included) and downcast the rest
+    df = df.reindex(columns=list(schema))
+    for col, dtype in schema.items():
+        df[col] = df[col].astype(dtype)
+    return df
+
+
+def widen_floats(df):
+    # float32 columns go back to float64 for arithmetic, JSON and CSV; they only hold
+    # whole numbers, so the conversion is exact
+    for col in df.columns:
+        if df[col].dtype == 'float32':
+            df[col] = df[col].astype('float64')
+    return df
+
+
+def frame_memory(df, derived_row_bytes):
+    # Bytes held by the compact frame vs. what the old layout (object strings, float64
+    # everywhere, stored derived columns) would take, worked out without building it
+    usage = df.memory_usage(deep=True)
+    rows = len(df)
+    loose = int(usage['Index']) + rows * derived_row_bytes
+    for col in df.columns:
+        loose += rows * 8
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            counts = np.bincount(df[col].cat.codes.to_numpy() + 1, minlength=len(df[col].cat.categories) + 1)
+            sizes = [sys.getsizeof(None)] + [sys.getsizeof(str(c)) for c in df[col].cat.categories]
+            loose += int(np.dot(counts, sizes))
+    compact = int(usage.sum())
+    return {'bytes': compact, 'uncompacted_bytes': loose, 'saved_bytes': loose - compact}
+
+
+EXPORT_CHUNK_ROWS = 5000
+
+
+def stream_export(df, profit_col, derive, start=None, end=None, fmt='csv', compress=False, chunk_rows=EXPORT_CHUNK_ROWS):
+    # Yields the rows of df in date order as CSV or NDJSON, chunk_rows at a time.
+    # Date-sorted frames (the normal case) are sliced straight off the selected range, so
+    # nothing per-row is allocated beyond the chunk being written. Unsorted frames need
+    # one boolean per row to select the range, then only the selected positions, sorted.
+    # A shallow copy keeps the snapshot stable (copy-on-write) if the user edits mid-export.
+    df = df.copy(deep=False)
+    dates = df['date'].to_numpy()
+    carry = 0.0
+    positions = None
+    if df['date'].is_monotonic_increasing:
+        lo = 0 if start is None else int(np.searchsorted(dates, np.datetime64(start), side='left'))
+        hi = len(dates) if end is None else int(np.searchsorted(dates, np.datetime64(end), side='right'))
+        total = max(0, hi - lo)
+        carry = float(df[profit_col].iloc[:lo].sum())
+    else:
+        if start is not None:
+            # rows before the window feed the running total, then the same array becomes the mask
+            mask = dates < np.datetime64(start)
+            carry = float(df[profit_col].to_numpy()[mask].sum())
+            np.logical_not(mask, out=mask)
+        else:
+            mask = np.ones(len(dates), dtype=bool)
+        if end is not None:
+            mask &= dates <= np.datetime64(end)
+        positions = np.flatnonzero(mask)
+        del mask
+        positions = positions[np.argsort(dates[positions], kind='stable')]
+        total = len(positions)
+
+    compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31 -> gzip container
+    for offset in range(0, max(total, 1), chunk_rows):
+        if positions is None:
+            rows = df.iloc[lo + offset:lo + min(offset + chunk_rows, total)]
+        else:
+            rows = df.iloc[positions[offset:offset + chunk_rows]]
+        chunk = widen_floats(rows.copy())
+        derive(chunk)
+        chunk['cumulative_profit'] = carry + chunk[profit_col].cumsum()
+        if len(chunk):
+            carry = float(chunk['cumulative_profit'].iloc[-1])
+        if fmt == 'ndjson':
+            text = chunk.to_json(orient='records', lines=True, date_format='iso') if len(chunk) else ''
+        else:
+            text = chunk.to_csv(index=False, header=offset == 0, date_format='%Y-%m-%dT%H:%M:%S')
+        data = text.encode('utf-8')
+        if compressor:
+            data = compressor.compress(data)
+        if data:
+            yield data
+    if compressor:
+        yield compressor.flush()
+
+
+CI_RESAMPLES = 500
+
+
+def bootstrap_group_means(values, codes, n_groups, resamples=CI_RESAMPLES, confidence=95.0, seed=0,
+                          max_draws=100, max_cells=1 << 20):
+    # Percentile bootstrap of per-group means for several metrics at once.
+    # values is (metrics, rows), codes gives each row's group (every group non-empty).
+    # Rows are sorted by group and each group gets a run of draw slots; one random
+    # array fills every slot of every group, each slot picking uniformly inside its own
+    # group's rows, and reduceat sums the runs back up per group.
+    # Groups larger than max_draws use an m-out-of-n bootstrap (m = max_draws) with the
+    # spread rescaled by sqrt(m / n), which keeps the cost flat as histories grow.
+    # Returns (bounds, counts): bounds is (2, metrics, groups), lower and upper.
+    order = np.argsort(codes, kind='stable')
+    values = values[:, order]
+    counts = np.bincount(codes, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    draws = np.minimum(counts, max_draws)
+    slot_group = np.repeat(np.arange(n_groups), draws)
+    slot_start = starts[slot_group]
+    slot_count = counts[slot_group]
+    slot_offsets = np.concatenate(([0], np.cumsum(draws)[:-1]))
+
+    rng = np.random.default_rng(seed)
+    batch = max(1, max_cells // len(slot_group))
+    boot = []
+    for done in range(0, resamples, batch):
+        size = min(batch, resamples - done)
+        picks = slot_start + (rng.random((size, len(slot_group)), dtype=np.float32) * slot_count).astype(np.int64)
+        boot.append(np.add.reduceat(values[:, picks], slot_offsets, axis=2) / draws)
+    boot = np.concatenate(boot, axis=1)
+
+    means = (np.add.reduceat(values, starts, axis=1) / counts)[:, None, :]
+    boot = means + (boot - means) * np.sqrt(draws / counts)
+    tail = (100 - confidence) / 2
+    return np.percentile(boot, [tail, 100 - tail], axis=1), counts
+
+
+def wilson_interval(successes, counts, z=1.959963984540054):
+    # Wilson score interval for per-group proportions, in percent; z defaults to 95%.
+    # Unlike a percentile bootstrap it stays open for all-win or all-loss groups,
+    # e.g. 7 wins from 7 sessions gives about [64.6, 100] rather than [100, 100].
+    # Returns (2, groups), lower and upper.
+    counts = np.asarray(counts, dtype='float64')
+    p = successes / counts
+    denom = 1 + z ** 2 / counts
+    centre = (p + z ** 2 / (2 * counts)) / denom
+    half = z * np.sqrt(p * (1 - p) / counts + z ** 2 / (4 * counts ** 2)) / denom
+    return np.clip(np.vstack([centre - half, centre + half]), 0, 1) * 100
+
+
+def memory_report(frames, derived_row_bytes):
+    users = {username: frame_memory(df, derived_row_bytes) for username, df in frames.items()}
+    total = {key: sum(u[key] for u in users.values()) for key in ('bytes', 'uncompacted_bytes', 'saved_bytes')}
+    return {'users': users, 'total': total}
+
+
 class PokerTracker:
-    def __init__(self):
+    def __init__(self, data_dir=None, hasher=None):
         self.users = {}
         self.user_data = {}
-        self.data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'userdata')
+        self.profit_index = {}
+        self.data_version = {}
+        self.ci_cache = {}
+        self.hasher = hasher or PasswordHasher()
+        self.data_dir = data_dir or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'userdata')
         # Create userdata directory if it doesn't exist
         if not os.path.exists(self.data_dir):
             os.makedirs(self.data_dir)
@@ -29,6 +410,111 @@ class PokerTracker:
     def get_users_file_path(self):
         return os.path.join(self.data_dir, 'users.json')
 
+    def frame(self, username):
+        # Stored columns plus the derived ones, computed fresh on every call
+        df = widen_floats(self.user_data[username].copy())
+        if df.empty:
+            return df.reindex(columns=list(POKER_SCHEMA) + POKER_DERIVED)
+        self.derive_rates(df)
+        # running total in date order, so back-dated sessions land where they belong
+        df['cumulative_profit'] = self.profit_index[username].running_totals(df['date'])
+        df['session_length_category'] = pd.cut(
+            df['duration'],
+            bins=[0, 2, 4, 6, 8, float('inf')],
+            labels=['0-2h', '2-4h', '4-6h', '6-8h', '8h+']
+        )
+        return df
+
+    def derive_rates(self, df):
+        df['bb_won'] = df['profit_loss'] / df['big_blind']
+        df['hourly_rate'] = (df['profit_loss'] / df['duration']).where(df['duration'] > 0, 0.0)
+
+    def memory_usage(self, username=None):
+        # One user's footprint, or every user's plus the total when username is None
+        if username is not None:
+            if username not in self.user_data:
+                return {'bytes': 0, 'uncompacted_bytes': 0, 'saved_bytes': 0, 'index_bytes': 0}
+            report = frame_memory(self.user_data[username], POKER_DERIVED_BYTES)
+            report['index_bytes'] = self.index_bytes(username)
+            return report
+        report = memory_report(self.user_data, POKER_DERIVED_BYTES)
+        for username, usage in report['users'].items():
+            usage['index_bytes'] = self.index_bytes(username)
+        report['total']['index_bytes'] = sum(u['index_bytes'] for u in report['users'].values())
+        return report
+
+    def index_bytes(self, username):
+        index = self.profit_index.get(username)
+        return index.nbytes() if index else 0
+
+    def touch(self, username):
+        # Bumped on every change to a user's sessions; keys the confidence interval cache
+        self.data_version[username] = self.data_version.get(username, 0) + 1
+
+    def confidence_intervals(self, username, df, version):
+        # version must be read before df was built, so a write in between can't get
+        # intervals from the older data cached under its newer version
+        cached = self.ci_cache.get(username)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        # win_rate is a proportion and gets a Wilson interval, since a bootstrap of an
+        # all-win group only ever resamples wins; the means below are bootstrapped
+        metrics = ['win_rate', 'avg_hourly', 'avg_bb_won']
+        wins = (df['profit_loss'] > 0).to_numpy(dtype='float64')
+        values = np.vstack([
+            df['hourly_rate'].to_numpy(dtype='float64'),
+            df['bb_won'].to_numpy(dtype='float64')
+        ])
+
+        # overall, per location and per stake partitions stacked so one bootstrap covers them all
+        location_groups = df.groupby('location', observed=True, dropna=False)
+        stake_groups = df.groupby(['small_blind', 'big_blind'], dropna=False)
+        partitions = [
+            ('overall', ['all'], np.zeros(len(df), dtype=np.int64)),
+            ('location', [str(k) for k in location_groups.size().index],
+             location_groups.ngroup().to_numpy()),
+            ('stake', [f"{sb},{bb}" for sb, bb in stake_groups.size().index],
+             stake_groups.ngroup().to_numpy())
+        ]
+        codes, offset = [], 0
+        for _, keys, group_codes in partitions:
+            codes.append(group_codes + offset)
+            offset += len(keys)
+        codes = np.concatenate(codes)
+        bounds, counts = bootstrap_group_means(np.tile(values, len(partitions)), codes, offset)
+        win_bounds = wilson_interval(np.bincount(codes, weights=np.tile(wins, len(partitions)), minlength=offset), counts)
+        bounds = np.concatenate([win_bounds[:, None, :], bounds], axis=1)
+
+        # a single session says nothing about spread, so those groups get no interval
+        def interval(m, g):
+            if counts[g] < 2:
+                return {'n': int(counts[g]), 'low': None, 'high': None}
+            return {
+                'n': int(counts[g]),
+                'low': round(float(bounds[0, m, g]), 2),
+                'high': round(float(bounds[1, m, g]), 2)
+            }
+
+        result = {'level': 95, 'resamples': CI_RESAMPLES}
+        offset = 0
+        for name, keys, _ in partitions:
+            result[name] = {
+                metric: {key: interval(m, offset + g) for g, key in enumerate(keys)}
+                for m, metric in enumerate(metrics)
+            }
+            offset += len(keys)
+        result['overall'] = {metric: cis['all'] for metric, cis in result['overall'].items()}
+
+        self.ci_cache[username] = (version, result)
+        return result
+
+    def export(self, username, start=None, end=None, fmt='csv', compress=False):
+        df = self.user_data.get(username)
+        if df is None or df.empty:
+            df = compact_frame(pd.DataFrame(), POKER_SCHEMA)
+        return stream_export(df, 'profit_loss', self.derive_rates, start, end, fmt, compress)
+
     def get_advanced_stats(self, username):
         if username not in self.user_data or len(self.user_data[username]) == 0:
             return {
@@ -51,18 +537,21 @@ class PokerTracker:
                         'avg_profit': {},
                         'session_count': {},
                         'avg_bb_won': {}
-                    }
+                    },
+                    'confidence_intervals': {}
                 }
             }
 
-        df = self.user_data[username]
+        version = self.data_version.get(username, 0)
+        df = self.frame(username)
         
         try:
             # Location statistics
-            location_profit_mean = df.groupby('location')['profit_loss'].mean().fillna(0)
-            location_profit_sum = df.groupby('location')['profit_loss'].sum().fillna(0)
-            location_profit_count = df.groupby('location')['profit_loss'].count().fillna(0)
-            location_bb_mean = df.groupby('location')['bb_won'].mean().fillna(0)
+            location_groups = df.groupby('location', observed=True)
+            location_profit_mean = location_groups['profit_loss'].mean().fillna(0)
+            location_profit_sum = location_groups['profit_loss'].sum().fillna(0)
+            location_profit_count = location_groups['profit_loss'].count().fillna(0)
+            location_bb_mean = location_groups['bb_won'].mean().fillna(0)
             
             location_stats = {
                 'avg_profit': {str(k): float(v) for k, v in location_profit_mean.items()},
@@ -103,13 +592,7 @@ class PokerTracker:
                 stake_winrates_dict[f"{sb},{bb}"] = {'profit_loss': float(win_rate)}
             
             # Session length analysis
-            df['session_length_category'] = pd.cut(
-                df['duration'], 
-                bins=[0, 2, 4, 6, 8, float('inf')],
-                labels=['0-2h', '2-4h', '4-6h', '6-8h', '8h+']
-            )
-            
-            length_groups = df.groupby('session_length_category')
+            length_groups = df.groupby('session_length_category', observed=False)
             length_profit_mean = length_groups['profit_loss'].mean().fillna(0)
             length_profit_count = length_groups['profit_loss'].count().fillna(0)
             length_bb_mean = length_groups['bb_won'].mean().fillna(0)
@@ -134,7 +617,8 @@ class PokerTracker:
                     'location_stats': location_stats,
                     'stake_distribution': stake_distribution,
                     'stake_winrates': stake_winrates_dict,
-                    'session_length_analysis': session_length_analysis
+                    'session_length_analysis': session_length_analysis,
+                    'confidence_intervals': self.confidence_intervals(username, df, version)
                 }
             }
             
@@ -149,17 +633,21 @@ class PokerTracker:
                     'location_stats': {},
                     'stake_distribution': {},
                     'stake_winrates': {},
-                    'session_length_analysis': {}
+                    'session_length_analysis': {},
+                    'confidence_intervals': {}
                 }
             }
 
     def save_data(self, username):
-        self.user_data[username].to_csv(self.get_user_data_path(username), index=False)
+        # on disk every numeric column is float64, whatever the in-memory layout
+        widen_floats(self.user_data[username].copy()).to_csv(self.get_user_data_path(username), index=False)
 
     def load_data(self, username):
         try:
-            self.user_data[username] = pd.read_csv(self.get_user_data_path(username))
-            self.user_data[username]['date'] = pd.to_datetime(self.user_data[username]['date'])
+            df = pd.read_csv(self.get_user_data_path(username))
+            df['date'] = pd.to_datetime(df['date'])
+            self.user_data[username] = compact_frame(df, POKER_SCHEMA)
+            self.touch(username)
         except FileNotFoundError:
             pass
 
@@ -178,6 +666,7 @@ class PokerTracker:
             for username in self.users:
                 self.user_data[username] = pd.DataFrame()
                 self.load_data(username)
+                self.profit_index[username] = ProfitIndex.from_frame(self.user_data[username])
         except FileNotFoundError:
             pass
 
@@ -186,26 +675,20 @@ class PokerTracker:
             return False
                 
         try:
-            # Get data sorted by date (newest first) to match frontend display
-            df = self.user_data[username].sort_values('date', ascending=False)
-            df = df.reset_index(drop=True)
-            
-            # Get the session data before removing
-            session = df.iloc[session_index]
-            
-            # Find the original index in the unsorted dataframe
-            original_index = self.user_data[username].index[
-                self.user_data[username]['date'] == session['date']
-            ][0]
+            # session_index counts newest first, matching the frontend display; the stable
+            # sort keeps sessions that share a timestamp in the same order get_sessions shows
+            df = self.user_data[username]
+            original_index = df.sort_values('date', ascending=False, kind='stable').index[session_index]
+            session = df.loc[original_index]
             
             # Remove session from original dataframe
-            self.user_data[username] = self.user_data[username].drop(original_index).reset_index(drop=True)
-            
-            # Revert ELO change
-            self.users[username]['elo'] -= session['elo_change']
+            self.user_data[username] = df.drop(original_index).reset_index(drop=True)
+            self.user_data[username]['location'] = self.user_data[username]['location'].cat.remove_unused_categories()
+            self.touch(username)
             
-            # Recalculate cumulative profit
-            self.user_data[username]['cumulative_profit'] = self.user_data[username]['profit_loss'].cumsum()
+            # Revert ELO change and take the session out of the profit index
+            self.users[username]['elo'] -= float(session['elo_change'])
+            self.profit_index[username].add(session['date'], -float(session['profit_loss']))
             
             # Save changes
             self.save_data(username)
@@ -219,70 +702,123 @@ class PokerTracker:
         if username in self.users:
             return False
         self.users[username] = {
-            'password_hash': generate_password_hash(password),
+            'password_hash': self.hasher.hash(password),
             'elo': 1000
         }
-        self.user_data[username] = pd.DataFrame({
-            'date': pd.Series(dtype='datetime64[ns]'),
-            'location': pd.Series(dtype='str'),
-            'small_blind': pd.Series(dtype='float64'),
-            'big_blind': pd.Series(dtype='float64'),
-            'buy_in': pd.Series(dtype='float64'),
-            'buy_out': pd.Series(dtype='float64'),
-            'duration': pd.Series(dtype='float64'),
-            'profit_loss': pd.Series(dtype='float64'),
-            'bb_won': pd.Series(dtype='float64'),
-            'elo_change': pd.Series(dtype='float64'),
-            'cumulative_profit': pd.Series(dtype='float64'),
-            'hourly_rate': pd.Series(dtype='float64')
-        })
+        self.user_data[username] = compact_frame(pd.DataFrame(), POKER_SCHEMA)
+        self.profit_index[username] = ProfitIndex()
+        self.touch(username)
         self.save_users()
         return True
 
     def verify_user(self, username, password):
         if username not in self.users:
             return False
-        return check_password_hash(self.users[username]['password_hash'], password)
+        return self.hasher.check(self.users[username]['password_hash'], password)
 
-    def add_session(self, username, session_data):
-        if username not in self.user_data:
-            return None
-                
+    def build_session(self, session_data, strict=False):
         profit_loss = session_data['buy_out'] - session_data['buy_in']
         bb_won = profit_loss / session_data['big_blind']
         
         elo_change = (bb_won > 0)*2.5 + bb_won/session_data['duration']
-        hourly_rate = profit_loss / session_data['duration'] if session_data['duration'] > 0 else 0
 
-        # Parse the datetime string
+        # Parse the datetime string; edits must say when the session was, new sessions
+        # fall back to now
         try:
             session_date = datetime.strptime(session_data['datetime'], '%Y-%m-%dT%H:%M')
         except (ValueError, KeyError):
+            if strict:
+                raise ValueError('datetime must be YYYY-MM-DDTHH:MM')
             session_date = datetime.now()
 
-        new_session = pd.DataFrame({
-            'date': [session_date],
-            'location': [session_data['location']],
-            'small_blind': [session_data['small_blind']],
-            'big_blind': [session_data['big_blind']],
-            'buy_in': [session_data['buy_in']],
-            'buy_out': [session_data['buy_out']],
-            'duration': [session_data['duration']],
-            'profit_loss': [profit_loss],
-            'bb_won': [bb_won],
-            'elo_change': [elo_change],
-            'hourly_rate': [hourly_rate],
-            'cumulative_profit': [0.0]
-        })
+        return {
+            'date': session_date,
+            'location': session_data['location'],
+            'small_blind': session_data['small_blind'],
+            'big_blind': session_data['big_blind'],
+            'buy_in': session_data['buy_in'],
+            'buy_out': session_data['buy_out'],
+            'duration': session_data['duration'],
+            'profit_loss': profit_loss,
+            'elo_change': elo_change
+        }
 
-        self.user_data[username] = pd.concat([self.user_data[username], new_session], ignore_index=True)
-        self.user_data[username]['cumulative_profit'] = self.user_data[username]['profit_loss'].cumsum()
-        self.users[username]['elo'] += elo_change
+    def add_session(self, username, session_data):
+        if username not in self.user_data:
+            return None
+                
+        row = self.build_session(session_data)
+        new_session = pd.DataFrame({k: [v] for k, v in row.items()})
+
+        df = pd.concat([self.user_data[username], new_session], ignore_index=True)
+        self.user_data[username] = compact_frame(df, POKER_SCHEMA)
+        self.profit_index[username].add(row['date'], row['profit_loss'])
+        self.touch(username)
+        self.users[username]['elo'] += row['elo_change']
         
+        self.save_data(username)
+        self.save_users()
+        return row['elo_change']
+
+    def add_sessions(self, username, sessions):
+        # Bulk add_session for imports: one concat, one index rebuild and one save for the batch
+        if username not in self.user_data:
+            return None
+
+        rows = [self.build_session(session_data) for session_data in sessions]
+        if not rows:
+            return 0.0
+        df = pd.concat([self.user_data[username], pd.DataFrame(rows)], ignore_index=True)
+        self.user_data[username] = compact_frame(df, POKER_SCHEMA)
+        self.profit_index[username] = ProfitIndex.from_frame(self.user_data[username])
+        self.touch(username)
+        elo_change = sum(row['elo_change'] for row in rows)
+        self.users[username]['elo'] += elo_change
+
         self.save_data(username)
         self.save_users()
         return elo_change
 
+    def edit_session(self, username, session_index, session_data):
+        if username not in self.user_data or session_index < 0:
+            return None
+
+        try:
+            df = self.user_data[username]
+            # session_index counts newest first, matching the frontend display
+            original_index = df.sort_values('date', ascending=False, kind='stable').index[session_index]
+            old = df.loc[original_index]
+            row = self.build_session(session_data, strict=True)
+
+            if row['location'] not in df['location'].cat.categories:
+                df['location'] = df['location'].cat.add_categories([row['location']])
+            for col, value in row.items():
+                df.loc[original_index, col] = value
+            df['location'] = df['location'].cat.remove_unused_categories()
+            self.touch(username)
+
+            index = self.profit_index[username]
+            index.add(old['date'], -float(old['profit_loss']))
+            index.add(row['date'], row['profit_loss'])
+            self.users[username]['elo'] += row['elo_change'] - float(old['elo_change'])
+
+            self.save_data(username)
+            self.save_users()
+            return row['elo_change']
+        except (KeyError, IndexError) as e:
+            print(f"Error editing session: {str(e)}")
+            return None
+
+    def cumulative_profit(self, username, date):
+        if username not in self.profit_index:
+            return 0.0
+        return self.profit_index[username].total_until(date)
+
+    def profit_between(self, username, start, end):
+        if username not in self.profit_index:
+            return 0.0
+        return self.profit_index[username].total_between(start, end)
+
     def get_stats(self, username):
         if username not in self.user_data or len(self.user_data[username]) == 0:
             return {
@@ -297,7 +833,7 @@ class PokerTracker:
                 'current_elo': self.users[username]['elo']
             }
 
-        df = self.user_data[username]
+        df = self.frame(username)
         return {
             'total_games': len(df),
             'total_profit': float(df['profit_loss'].sum()),
@@ -316,8 +852,9 @@ class PokerTracker:
             
         try:
             # Return all sessions, sorted by date (newest first)
-            df = self.user_data[username].copy()
-            df = df.sort_values('date', ascending=False)
+            df = self.frame(username)
+            df['location'] = df['location'].astype('object')
+            df = df.sort_values('date', ascending=False, kind='stable')
             df = df.reset_index(drop=True)  # Reset index after sorting
             
             # Convert any potential NaN values to appropriate defaults
@@ -344,10 +881,10 @@ class PokerTracker:
 
 
 class SportTracker:
-    def __init__(self):
+    def __init__(self, data_dir=None):
         self.usersbetting = {}
         self.user_bets = {}
-        self.data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sportsdata')
+        self.data_dir = data_dir or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sportsdata')
         if not os.path.exists(self.data_dir):
             os.makedirs(self.data_dir)
         self.load_users()
@@ -356,6 +893,32 @@ class SportTracker:
         #returns file path for user's bets CSV File
         return os.path.join(self.data_dir, f'bet_data_{username}.csv')
     
+    def frame(self, username):
+        # stored bet columns plus derived ones, recomputed on every call
+        df = widen_floats(self.user_bets[username].copy())
+        if df.empty:
+            return df.reindex(columns=list(SPORT_SCHEMA) + SPORT_DERIVED)
+        df['cumulative_profit'] = df['amountwonlost'].cumsum()
+        df['bet_amount_category'] = pd.cut(
+            df['bet amount'],
+            bins=[0, 10, 20, 30, 40, float('inf')],
+            labels=['$0-10', '$10-20', '$20-30', '$30-40', '$40+']
+        )
+        return df
+
+    def memory_usage(self, username=None):
+        if username is not None:
+            if username not in self.user_bets:
+                return {'bytes': 0, 'uncompacted_bytes': 0, 'saved_bytes': 0}
+            return frame_memory(self.user_bets[username], SPORT_DERIVED_BYTES)
+        return memory_report(self.user_bets, SPORT_DERIVED_BYTES)
+
+    def export(self, username, start=None, end=None, fmt='csv', compress=False):
+        df = self.user_bets.get(username)
+        if df is None or df.empty:
+            df = compact_frame(pd.DataFrame(), SPORT_SCHEMA)
+        return stream_export(df, 'amountwonlost', lambda chunk: None, start, end, fmt, compress)
+
 
     def get_users_file_path(self):
         #returns file path for json file that stores all users
@@ -367,14 +930,7 @@ class SportTracker:
 
         self.usersbetting[username] = {'elo':1000}
 
-        self.user_bets[username] = pd.DataFrame({
-            'date': pd.Series(dtype='datetime64[ns]'),
-            'sport': pd.Series(dtype='str'),
-            '# picks': pd.Series(dtype='float64'),
-            'bet amount': pd.Series(dtype='float64'),
-            'amountwonlost': pd.Series(dtype='float64'),
-            'elochange': pd.Series(dtype='float64'),
-        })
+        self.user_bets[username] = compact_frame(pd.DataFrame(), SPORT_SCHEMA)
 
         self.save_users()
         return True
@@ -405,13 +961,12 @@ class SportTracker:
             '# picks': [picks],
             'bet amount': [bet_amount],
             'amountwonlost': [amountwonlost],
-            'elochange': [elo_change],
-            'cumulative_profit': [0.0]
+            'elochange': [elo_change]
         })
 
 
-        self.user_bets[username] = pd.concat([self.user_bets[username], new_bet], ignore_index=True)
-        self.user_bets[username]['cumulative_profit'] = self.user_bets[username]['amountwonlost'].cumsum()
+        df = pd.concat([self.user_bets[username], new_bet], ignore_index=True)
+        self.user_bets[username] = compact_frame(df, SPORT_SCHEMA)
         self.usersbetting[username]['elo'] += elo_change
         
         self.save_data(username)
@@ -431,7 +986,7 @@ class SportTracker:
                 'balance':self.usersbetting.get(username,{}).get('balance',0)
             }
         
-        df = self.user_bets[username]
+        df = self.frame(username)
         total_bets = len(df)
         total_profit = df['cumulative_profit']
         win_rate = (df['cumulative_profit']>0).mean()*100
@@ -450,14 +1005,15 @@ class SportTracker:
         }
 
     def save_data(self, username):
-        # Saves the user's bet data to a CSV file
-        self.user_bets[username].to_csv(self.get_user_data_path(username), index=False)
+        # Saves the user's bet data to a CSV file, numeric columns as float64
+        widen_floats(self.user_bets[username].copy()).to_csv(self.get_user_data_path(username), index=False)
 
     def load_data(self, username):
         # Loads bet data from a CSV file into the user's DataFrame
         try:
-            self.user_bets[username] = pd.read_csv(self.get_user_data_path(username))
-            self.user_bets[username]['date'] = pd.to_datetime(self.user_bets[username]['date'])
+            df = pd.read_csv(self.get_user_data_path(username))
+            df['date'] = pd.to_datetime(df['date'])
+            self.user_bets[username] = compact_frame(df, SPORT_SCHEMA)
         except FileNotFoundError:
             pass
 
@@ -486,7 +1042,8 @@ class SportTracker:
         if username not in self.user_bets:
             return []
         try:
-            df = self.user_bets[username].copy()
+            df = self.frame(username)
+            df['sport'] = df['sport'].astype('object')
             df = df.sort_values('date', ascending=False).reset_index(drop=True)
             df = df.reset_index(drop=True)
 
@@ -521,9 +1078,9 @@ class SportTracker:
 
             # Remove session from original dataframe
             self.user_bets[username] = self.user_bets[username].drop(original_index).reset_index(drop=True)
+            self.user_bets[username]['sport'] = self.user_bets[username]['sport'].cat.remove_unused_categories()
 
             self.usersbetting[username]['elo'] -= session['elo_change']
-            self.user_bets[username]['cumulative_profit'] = self.user_bets[username]['amountwonlost'].cumsum()
 
             self.save_data(username)
             self.save_users()
@@ -552,12 +1109,13 @@ class SportTracker:
                 }
             }
         
-        df = self.user_bets[username]
+        df = self.frame(username)
         try:
             #sports stats
-            sport_profit_mean = df.groupby('sport')['amountwonlost'].mean().fillna(0)
-            sport_profit_sum = df.groupby('sport')['amountwonlost'].sum().fillna(0)
-            sport_session_count = df.groupby('sport')['amountwonlost'].count().fillna(0)
+            sport_groups = df.groupby('sport', observed=True)
+            sport_profit_mean = sport_groups['amountwonlost'].mean().fillna(0)
+            sport_profit_sum = sport_groups['amountwonlost'].sum().fillna(0)
+            sport_session_count = sport_groups['amountwonlost'].count().fillna(0)
 
             sports_stats = {
                 'avg_profit': {str(k):float(v) for k,v in sport_profit_mean.items()},
@@ -567,13 +1125,7 @@ class SportTracker:
 
 
             # bet amount analysis
-            df['bet_amount_category'] = pd.cut(
-                df['bet amount'], 
-                bins=[0, 10, 20, 30, 40, float('inf')],
-                labels=['$0-10', '$10-20', '$20-30', '$30-40', '$40+']
-            )
-
-            amount_groups = df.groupby('bet_amount_category')
+            amount_groups = df.groupby('bet_amount_category', observed=False)
             amount_profit_mean = amount_groups['amountwonlost'].mean().fillna(0)
             amount_profit_sum = amount_groups['amountwonlost'].sum().fillna(0)
             amount_profit_count = amount_groups['amountwonlost'].count().fillna(0)
@@ -620,6 +1172,12 @@ class SportTracker:
 poktracker = PokerTracker()
 sportstracker = SportTracker()
 
+# login throttles. The IP limit counts every attempt. The per-account limit counts only
+# failed passwords and is keyed on (username, client IP), so strangers guessing at an
+# account can't lock its owner out from another address.
+ip_throttle = AttemptThrottle(max_attempts=30)
+user_throttle = AttemptThrottle(max_attempts=10)
+
 
 
 # require login
@@ -637,9 +1195,18 @@ def login():
     if request.method == 'POST':
         username = request.form['username']
         password = request.form['password']
-        if poktracker.verify_user(username, password):
+        user_key = (username, request.remote_addr)
+        if not ip_throttle.allow(request.remote_addr) or user_throttle.blocked(user_key):
+            return render_template('login.html', error='Too many login attempts, try again later'), 429
+        try:
+            verified = poktracker.verify_user(username, password)
+        except HasherBusy:
+            return render_template('login.html', error='Server busy, try again shortly'), 503
+        if verified:
+            user_throttle.reset(user_key)
             session['username'] = username
             return redirect(url_for('home'))
+        user_throttle.record(user_key)
         return render_template('login.html', error='Invalid credentials')
     return render_template('login.html')
 
@@ -663,8 +1230,15 @@ def register():
         if password != confirm_password:
             return render_template('register.html', error='Passwords do not match')
 
+        if not ip_throttle.allow(request.remote_addr):
+            return render_template('register.html', error='Too many attempts, try again later'), 429
+
         # Try to create user
-        if poktracker.create_user(username, password):
+        try:
+            created = poktracker.create_user(username, password)
+        except HasherBusy:
+            return render_template('register.html', error='Server busy, try again shortly'), 503
+        if created:
             session['username'] = username
             return redirect(url_for('home'))  # Make sure this matches your main route function name
         
@@ -756,6 +1330,80 @@ def add_session():
         app.logger.error(f'Error adding session: {str(e)}')
         return jsonify({'error': 'Server error'}), 500
     
+@app.route('/api/edit_session', methods=['POST'])
+@login_required
+def edit_session():
+    try:
+        data = request.get_json()
+        if not all(k in data for k in ['session_index', 'location', 'small_blind', 'big_blind', 'buy_in', 'buy_out', 'duration', 'datetime']):
+            return jsonify({'error': 'Missing required fields'}), 400
+
+        session_index = int(data['session_index'])
+        if session_index < 0:
+            return jsonify({'error': 'session_index must be 0 or more'}), 400
+        # no fallback to now here: a typo would move a past session to today
+        datetime.strptime(data['datetime'], '%Y-%m-%dT%H:%M')
+
+        elo_change = poktracker.edit_session(session['username'], session_index, {
+            'location': data['location'],
+            'small_blind': float(data['small_blind']),
+            'big_blind': float(data['big_blind']),
+            'buy_in': float(data['buy_in']),
+            'buy_out': float(data['buy_out']),
+            'duration': float(data['duration']),
+            'datetime': data['datetime']
+        })
+
+        if elo_change is None:
+            return jsonify({'error': 'Failed to edit session'}), 400
+
+        return jsonify({'success': True, 'elo_change': elo_change})
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': f'Invalid data format: {str(e)}'}), 400
+    except Exception as e:
+        app.logger.error(f'Error editing session: {str(e)}')
+        return jsonify({'error': 'Server error'}), 500
+
+@app.route('/api/cumulative_profit')
+@login_required
+def get_cumulative_profit():
+    # ?date=... for the running total at a date, or ?start=...&end=... for a range
+    try:
+        if request.args.get('date'):
+            date = datetime.strptime(request.args['date'], '%Y-%m-%dT%H:%M')
+            return jsonify({'data': {'date': date.isoformat(), 'cumulative_profit': poktracker.cumulative_profit(session['username'], date)}})
+        start = datetime.strptime(request.args['start'], '%Y-%m-%dT%H:%M')
+        end = datetime.strptime(request.args['end'], '%Y-%m-%dT%H:%M')
+    except (KeyError, ValueError):
+        return jsonify({'error': 'Expected date, or start and end, as YYYY-MM-DDTHH:MM'}), 400
+    return jsonify({'data': {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'profit': poktracker.profit_between(session['username'], start, end)
+    }})
+
+@app.route('/api/export')
+@login_required
+def export_history():
+    # ?kind=poker|sports&format=csv|ndjson&start=...&end=...&gzip=1
+    kind = request.args.get('kind', 'poker')
+    fmt = request.args.get('format', 'csv')
+    compress = request.args.get('gzip', '0').lower() in ('1', 'true', 'yes')
+    if kind not in ('poker', 'sports') or fmt not in ('csv', 'ndjson'):
+        return jsonify({'error': 'kind must be poker or sports, format must be csv or ndjson'}), 400
+    try:
+        start = datetime.strptime(request.args['start'], '%Y-%m-%dT%H:%M') if request.args.get('start') else None
+        end = datetime.strptime(request.args['end'], '%Y-%m-%dT%H:%M') if request.args.get('end') else None
+    except ValueError:
+        return jsonify({'error': 'start and end must be YYYY-MM-DDTHH:MM'}), 400
+
+    tracker = poktracker if kind == 'poker' else sportstracker
+    rows = tracker.export(session['username'], start, end, fmt, compress)
+    filename = f"{kind}_{session['username']}.{fmt}" + ('.gz' if compress else '')
+    mimetype = 'application/gzip' if compress else ('text/csv' if fmt == 'csv' else 'application/x-ndjson')
+    return Response(stream_with_context(rows), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
 @app.route('/api/remove_session', methods=['POST'])
 @login_required
 def remove_session():
@@ -778,6 +1426,17 @@ def get_advanced_stats():
         'data': poktracker.get_advanced_stats(session['username'])
     })
 
+@app.route('/api/memory')
+@login_required
+def get_memory():
+    # only the caller's frames; the all-users report is memory_usage() with no username
+    return jsonify({
+        'data': {
+            'poker': poktracker.memory_usage(session['username']),
+            'sports': sportstracker.memory_usage(session['username'])
+        }
+    })
+
 #sports functions
 
 @app.route('/sports')
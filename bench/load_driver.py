@@ -0,0 +1,293 @@
+# bench/load_driver.py
+# Simulates many dashboard users against the app and reports per-endpoint latency.
+# Each virtual user registers, logs in, then follows poker.html: the stats/sessions/
+# advanced_stats triple on page load, the same triple every 30 seconds, and now and
+# then an add or remove followed by a refresh. Nothing leaves the machine.
+#
+#   python bench/load_driver.py --users 50 --history 500 --duration 120
+#   python bench/load_driver.py --time-scale 10          # 30s polls every 3s of wall time
+#   python bench/load_driver.py --url http://127.0.0.1:5000
+#
+# Without --url it drives the Flask test client on a throwaway data dir. With --url the
+# server's own login throttles apply, so registration backs off on 429s and 503s. A user
+# whose login does not end in the redirect to / is dropped (or, in-process, aborts setup),
+# and any redirect from /api/* counts as an error since it means the session was lost.
+import argparse
+import heapq
+import http.cookiejar
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+LOCATIONS = ['Home Game', 'Casino', 'Club', 'Online', "Friend's Appt"]
+STAKES = [(0.1, 0.2), (0.25, 0.5), (0.5, 1.0), (1.0, 2.0), (2.0, 5.0)]
+DASHBOARD = ['/api/stats', '/api/sessions', '/api/advanced_stats']
+
+
+def random_session(rng, days=30):
+    sb, bb = STAKES[rng.integers(0, len(STAKES))]
+    when = datetime.now() - timedelta(minutes=int(rng.integers(60, days * 24 * 60)))
+    return {
+        'datetime': when.strftime('%Y-%m-%dT%H:%M'),
+        'location': str(rng.choice(LOCATIONS)),
+        'small_blind': sb,
+        'big_blind': bb,
+        'buy_in': bb * 100,
+        'buy_out': round(max(bb * 100 * (1 + rng.normal(0.05, 1.0)), 0), 2),
+        'duration': float(rng.choice([1.0, 1.5, 2.0, 3.0, 4.0, 5.0, 6.0, 8.0]))
+    }
+
+
+def synthetic_history(rng, count):
+    # two years of sessions in the same shape the add-session form posts
+    return [random_session(rng, days=2 * 365) for _ in range(count)]
+
+
+class TestClientUser:
+    def __init__(self, webapp, idx):
+        self.client = webapp.app.test_client()
+        self.environ = {'REMOTE_ADDR': f'10.{idx // 65536 % 256}.{idx // 256 % 256}.{idx % 256}'}
+
+    def get(self, path):
+        return self.client.get(path, environ_base=self.environ).status_code
+
+    def post_form(self, path, data):
+        # (status, Location) so callers can tell the post-login redirect from a re-rendered form
+        resp = self.client.post(path, data=data, environ_base=self.environ)
+        return resp.status_code, resp.headers.get('Location')
+
+    def post_json(self, path, data):
+        return self.client.post(path, json=data, environ_base=self.environ).status_code
+
+
+class HttpUser:
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        # don't follow the post-login redirect, the browser's follow-up page load isn't an API call
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), NoRedirect())
+
+    def send(self, path, body=None, content_type=None):
+        req = urllib.request.Request(self.base_url + path, data=body)
+        if content_type:
+            req.add_header('Content-Type', content_type)
+        try:
+            with self.opener.open(req, timeout=60) as resp:
+                resp.read()
+                return resp.status, resp.headers.get('Location')
+        except urllib.error.HTTPError as e:
+            # unfollowed redirects land here too, with their Location header intact
+            return e.code, e.headers.get('Location')
+
+    def get(self, path):
+        return self.send(path)[0]
+
+    def post_form(self, path, data):
+        return self.send(path, urllib.parse.urlencode(data).encode(), 'application/x-www-form-urlencoded')
+
+    def post_json(self, path, data):
+        return self.send(path, json.dumps(data).encode(), 'application/json')[0]
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self.lock = threading.Lock()
+
+    def call(self, name, fn, *args):
+        start = time.perf_counter()
+        status = fn(*args)
+        # the API never redirects a logged-in user, a 3xx there is the login_required bounce
+        error = status >= 400 or (name.startswith('/api/') and status >= 300)
+        self.record(name, time.perf_counter() - start, error)
+        return status
+
+    def record(self, name, seconds, error=False):
+        with self.lock:
+            self.samples.setdefault(name, []).append(seconds)
+            if error:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+    def report(self, wall_seconds):
+        total = sum(len(v) for name, v in self.samples.items() if not name.startswith('('))
+        print(f'{total} requests in {wall_seconds:.1f}s -> {total / wall_seconds:.1f} req/s')
+        print(f"{'endpoint':<24}{'count':>8}{'errors':>8}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for name in sorted(self.samples):
+            ms = np.array(self.samples[name]) * 1000
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            print(f'{name:<24}{len(ms):>8}{self.errors.get(name, 0):>8}{len(ms) / wall_seconds:>9.1f}'
+                  f'{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}')
+
+
+class VirtualUser:
+    def __init__(self, client, username, rng):
+        self.client = client
+        self.username = username
+        self.rng = rng
+        self.sessions = 0
+
+    def dashboard(self, rec):
+        for path in DASHBOARD:
+            rec.call(path, self.client.get, path)
+
+    def cycle(self, rec, mutate_prob):
+        # one 30s poll, occasionally preceded by an add or remove like the page's forms
+        roll = self.rng.random()
+        if roll < mutate_prob / 2:
+            rec.call('/api/add_session', self.client.post_json, '/api/add_session', random_session(self.rng))
+            self.sessions += 1
+        elif roll < mutate_prob and self.sessions > 0:
+            index = int(self.rng.integers(0, self.sessions))
+            if rec.call('/api/remove_session', self.client.post_json, '/api/remove_session', {'session_index': index}) < 400:
+                self.sessions -= 1
+        self.dashboard(rec)
+
+
+def register_and_login(client, username, password, rec, retry_until):
+    # True once both forms answered with the redirect to /, the only sign of success;
+    # failures re-render the form with a 200
+    form = {'username': username, 'password': password, 'confirm_password': password}
+    for path, data in (('/register', form), ('/login', {'username': username, 'password': password})):
+        while True:
+            start = time.perf_counter()
+            status, location = client.post_form(path, data)
+            ok = 300 <= status < 400 and urllib.parse.urlparse(location or '').path == '/'
+            rec.record(path, time.perf_counter() - start, not ok)
+            if ok:
+                break
+            if status not in (429, 503) or time.time() > retry_until:
+                return False
+            time.sleep(2)
+    return True
+
+
+def setup_in_process(args, rng, rec):
+    import app as webapp
+
+    data_dir = tempfile.mkdtemp(prefix='edge_load_')
+    webapp.poktracker = webapp.PokerTracker(data_dir=data_dir)
+    webapp.sportstracker = webapp.SportTracker(data_dir=os.path.join(data_dir, 'sports'))
+
+    users = []
+    for i in range(args.users):
+        username = f'load{i}'
+        client = TestClientUser(webapp, i)
+        if not register_and_login(client, username, 'loadtest-pass', rec, time.time()):
+            sys.exit(f'setup failed: could not register and log in {username}')
+        webapp.poktracker.add_sessions(username, synthetic_history(rng, args.history))
+        user = VirtualUser(client, username, np.random.default_rng(rng.integers(1 << 32)))
+        user.sessions = args.history
+        users.append(user)
+    print(f'in-process app, data dir {data_dir}')
+    return users
+
+
+def setup_server(args, rng, rec):
+    users = []
+    tag = datetime.now().strftime('%H%M%S')
+    for i in range(args.users):
+        username = f'load{tag}x{i}'
+        client = HttpUser(args.url)
+        if not register_and_login(client, username, 'loadtest-pass', rec, time.time() + 120):
+            print(f'dropping {username}: login did not redirect to /')
+            continue
+        statuses = [client.post_json('/api/add_session', session_data)
+                    for session_data in synthetic_history(rng, args.history)]
+        if any(status != 200 for status in statuses):
+            print(f'dropping {username}: history upload failed')
+            continue
+        user = VirtualUser(client, username, np.random.default_rng(rng.integers(1 << 32)))
+        user.sessions = args.history
+        users.append(user)
+    if not users:
+        sys.exit('setup failed: no user could log in')
+    print(f'server {args.url}, {len(users)} of {args.users} users logged in')
+    return users
+
+
+def run(users, args, rec):
+    interval = args.poll / args.time_scale
+    start = time.time()
+    deadline = start + args.duration
+    # page loads are spread over the first poll interval, like users arriving at random
+    due = [(start + random.random() * interval, i, True) for i in range(len(users))]
+    heapq.heapify(due)
+    lock = threading.Lock()
+
+    def visit(i, first, when):
+        # per-endpoint rows time the request alone; these two also count the wait in the
+        # pool queue and any scheduling slip, which is where saturation shows up first
+        rec.record('(schedule lag)', max(0.0, time.time() - when))
+        if first:
+            users[i].dashboard(rec)
+        else:
+            users[i].cycle(rec, args.mutate_prob)
+        rec.record('(cycle from schedule)', time.time() - when)
+        with lock:
+            heapq.heappush(due, (time.time() + interval, i, False))
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        while True:
+            with lock:
+                when, i, first = heapq.heappop(due) if due else (None, None, None)
+            if when is None:
+                time.sleep(0.01)
+                continue
+            if when > deadline:
+                break
+            time.sleep(max(0.0, when - time.time()))
+            pool.submit(visit, i, first, when)
+    return time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay the poker dashboard client pattern for many users')
+    parser.add_argument('--users', type=int, default=50, help='virtual users')
+    parser.add_argument('--history', type=int, default=200, help='preloaded sessions per user')
+    parser.add_argument('--duration', type=float, default=90, help='seconds of steady-state load')
+    parser.add_argument('--poll', type=float, default=30, help='dashboard polling interval, as in poker.html')
+    parser.add_argument('--time-scale', type=float, default=1, help='compress polling by this factor')
+    parser.add_argument('--mutate-prob', type=float, default=0.05, help='chance a poll cycle adds or removes a session')
+    parser.add_argument('--concurrency', type=int, default=16, help='requests in flight at once')
+    parser.add_argument('--url', help='drive a running server instead of the in-process test client')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    rng = np.random.default_rng(args.seed)
+    setup_rec = Recorder()
+    setup_start = time.time()
+    users = setup_server(args, rng, setup_rec) if args.url else setup_in_process(args, rng, setup_rec)
+    setup_wall = time.time() - setup_start
+
+    rec = Recorder()
+    wall = run(users, args, rec)
+    print(f'{len(users)} users x {args.history} sessions, poll every {args.poll / args.time_scale:.1f}s '
+          f'({args.poll:.0f}s / {args.time_scale:g}), concurrency {args.concurrency}')
+    print('-- setup --')
+    setup_rec.report(setup_wall)
+    print('-- steady state --')
+    rec.report(wall)
+
+
+if __name__ == '__main__':
+    main()
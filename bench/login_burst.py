@@ -0,0 +1,101 @@
+# bench/login_burst.py
+# Measures /api/stats latency while a burst of logins hammers /login.
+# Runs fully in-process against the Flask test client on a throwaway data dir.
+#
+#   python bench/login_burst.py                  # bounded hashing pool (default)
+#   python bench/login_burst.py --workers 32     # roughly the old "hash on every request thread"
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app as webapp
+
+
+def percentiles(samples):
+    if not samples:
+        return 'no samples'
+    ms = np.array(samples) * 1000
+    return 'n={} p50={:.1f}ms p95={:.1f}ms p99={:.1f}ms max={:.1f}ms'.format(
+        len(ms), *np.percentile(ms, [50, 95, 99]), ms.max())
+
+
+def time_stats_calls(client, count):
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        client.get('/api/stats')
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def login_storm(stop, results, lock, idx, password):
+    client = webapp.app.test_client()
+    environ = {'REMOTE_ADDR': f'10.0.{idx // 250}.{idx % 250}'}
+    while not stop.is_set():
+        resp = client.post('/login', data={'username': 'bench', 'password': password},
+                           environ_base=environ)
+        with lock:
+            results[resp.status_code] = results.get(resp.status_code, 0) + 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description='API latency during a login burst')
+    parser.add_argument('--workers', type=int, default=None, help='hashing pool size (default: app default)')
+    parser.add_argument('--pending', type=int, default=16, help='max queued hashes before rejecting')
+    parser.add_argument('--burst', type=int, default=32, help='concurrent login threads')
+    parser.add_argument('--requests', type=int, default=200, help='/api/stats calls per phase')
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix='edge_bench_')
+    hasher = webapp.PasswordHasher(max_workers=args.workers, max_pending=args.pending)
+    webapp.poktracker = webapp.PokerTracker(data_dir=data_dir, hasher=hasher)
+    # the storm is the point of the benchmark, so keep the throttles out of its way
+    webapp.ip_throttle = webapp.AttemptThrottle(max_attempts=10 ** 9)
+    webapp.user_throttle = webapp.AttemptThrottle(max_attempts=10 ** 9)
+
+    webapp.poktracker.create_user('bench', 'benchpass')
+    for i in range(200):
+        webapp.poktracker.add_session('bench', {
+            'location': f'Room {i % 5}',
+            'small_blind': 0.1,
+            'big_blind': 0.2,
+            'buy_in': 20.0,
+            'buy_out': 20.0 + (i % 7) - 3,
+            'duration': 1.0 + i % 6,
+            'datetime': f'2025-01-{1 + i % 28:02d}T20:00'
+        })
+
+    client = webapp.app.test_client()
+    with client.session_transaction() as sess:
+        sess['username'] = 'bench'
+
+    time_stats_calls(client, 20)  # warm up
+    baseline = time_stats_calls(client, args.requests)
+
+    stop = threading.Event()
+    results, lock = {}, threading.Lock()
+    threads = [threading.Thread(target=login_storm, args=(stop, results, lock, i, 'wrong-password'))
+               for i in range(args.burst)]
+    for t in threads:
+        t.start()
+    time.sleep(0.5)
+    during = time_stats_calls(client, args.requests)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    print(f'hashing pool: workers={hasher.executor._max_workers} pending={args.pending}; '
+          f'login threads={args.burst}; cpus={os.cpu_count()}')
+    print(f'/api/stats baseline:     {percentiles(baseline)}')
+    print(f'/api/stats during burst: {percentiles(during)}')
+    print('login responses by status: ' + ', '.join(f'{k}={v}' for k, v in sorted(results.items())))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app
+
+
+def brute_total(frame, until):
+    return frame.loc[frame['date'] <= until, 'profit_loss'].sum()
+
+
+def random_stamp(rng):
+    return f'2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:{rng.choice([0, 30]):02d}'
+
+
+def test_index_matches_brute_force_sums():
+    rng = random.Random(0)
+    index = app.ProfitIndex()
+    rows = []
+    for step in range(3000):
+        if rows and rng.random() < 0.3:
+            date, amount = rows.pop(rng.randrange(len(rows)))
+            index.add(date, -amount)
+        else:
+            date, amount = pd.Timestamp(random_stamp(rng)), float(rng.randint(-100, 100))
+            rows.append((date, amount))
+            index.add(date, amount)
+        if step % 100 == 0:
+            frame = pd.DataFrame(rows, columns=['date', 'profit_loss'])
+            for _ in range(5):
+                start, end = sorted([pd.Timestamp(random_stamp(rng)), pd.Timestamp(random_stamp(rng))])
+                assert index.total_until(end) == pytest.approx(brute_total(frame, end))
+                expected = frame.loc[(frame['date'] >= start) & (frame['date'] <= end), 'profit_loss'].sum()
+                assert index.total_between(start, end) == pytest.approx(expected)
+
+
+def test_running_totals_follow_date_order():
+    dates = pd.to_datetime(['2025-03-01 10:00', '2025-01-01 10:00', '2025-02-01 10:00'])
+    index = app.ProfitIndex(app.ProfitIndex.minutes(dates), [5.0, -20.0, 10.0])
+    assert list(index.running_totals(dates)) == [-5.0, -20.0, -10.0]
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    tracker = app.PokerTracker(data_dir=str(tmp_path), hasher=app.PasswordHasher(max_workers=1))
+    tracker.create_user('u', 'password')
+    return tracker
+
+
+def session(stamp, buy_out):
+    return {'location': 'Club', 'small_blind': 0.5, 'big_blind': 1.0, 'buy_in': 100.0,
+            'buy_out': float(buy_out), 'duration': 2.0, 'datetime': stamp}
+
+
+def test_tracker_add_edit_remove_keep_index_in_sync(tracker):
+    rng = random.Random(1)
+    for step in range(300):
+        count = len(tracker.user_data['u'])
+        roll = rng.random()
+        if roll < 0.6 or count == 0:
+            tracker.add_session('u', session(random_stamp(rng), rng.randint(0, 200)))
+        elif roll < 0.8:
+            assert tracker.remove_session('u', rng.randrange(count))
+        else:
+            assert tracker.edit_session('u', rng.randrange(count), session(random_stamp(rng), rng.randint(0, 200))) is not None
+        if step % 30 == 0:
+            frame = tracker.frame('u')
+            for stamp in ['2025-03-01T00:00', '2025-07-15T12:00', '2026-01-01T00:00']:
+                assert tracker.cumulative_profit('u', stamp) == pytest.approx(brute_total(frame, stamp))
+            expected = frame.apply(lambda row: brute_total(frame, row['date']), axis=1)
+            assert np.allclose(frame['cumulative_profit'], expected)
+
+
+def test_remove_with_tied_timestamps_removes_the_indexed_row(tracker):
+    tracker.add_session('u', session('2025-01-01T20:00', 110))
+    tracker.add_session('u', session('2025-01-01T20:00', 80))
+    tracker.remove_session('u', 1)
+    assert tracker.cumulative_profit('u', '2025-02-01T00:00') == tracker.frame('u')['profit_loss'].sum()
+
+
+def test_edit_endpoint_rejects_bad_datetime_and_negative_index(tracker, monkeypatch):
+    monkeypatch.setattr(app, 'poktracker', tracker)
+    tracker.add_session('u', session('2025-01-01T20:00', 110))
+    client = app.app.test_client()
+    with client.session_transaction() as sess:
+        sess['username'] = 'u'
+
+    bad_date = dict(session('2025-13-45T99:00', 50), session_index=0)
+    assert client.post('/api/edit_session', json=bad_date).status_code == 400
+    negative = dict(session('2025-01-02T20:00', 50), session_index=-1)
+    assert client.post('/api/edit_session', json=negative).status_code == 400
+    assert tracker.frame('u')['date'].iloc[0] == pd.Timestamp('2025-01-01 20:00')
+
+    good = dict(session('2025-01-02T20:00', 50), session_index=0)
+    assert client.post('/api/edit_session', json=good).status_code == 200
+    assert tracker.cumulative_profit('u', '2025-01-01T23:59') == 0
+    assert tracker.cumulative_profit('u', '2025-01-03T00:00') == -50